@@ -4,10 +4,17 @@ FlatBuffer Tooling Generator for BPIO2
 Generates FlatBuffer tooling for all supported languages using flatc and flatcc compilers.
 """
 
+import concurrent.futures
+import functools
+import hashlib
 import os
+import shutil
 import subprocess
 import sys
+import tempfile
+import threading
 import argparse
+from datetime import datetime
 from pathlib import Path
 
 # Language configurations for flatc
@@ -29,40 +36,65 @@ FLATC_LANGUAGES = {
     'typescript': '--ts'
 }
 
+# File extensions emitted by flatc for each language, used to sort the output
+# of a single multi-language flatc run into per-language directories
+FLATC_EXTENSIONS = {
+    '.h': 'cpp',
+    '.cs': 'csharp',
+    '.dart': 'dart',
+    '.go': 'go',
+    '.java': 'java',
+    '.kt': 'kotlin',
+    '.lobster': 'lobster',
+    '.lua': 'lua',
+    '.nim': 'nim',
+    '.php': 'php',
+    '.py': 'python',
+    '.rs': 'rust',
+    '.swift': 'swift',
+    '.ts': 'typescript'
+}
+
 # Special case languages that need different handling
 FLATCC_LANGUAGES = {
     'c': ['-a']  # flatcc uses -a flag for all C files
 }
 
+# Serializes output from the flatc and flatcc generators running side by side
+_print_lock = threading.Lock()
+
+# Marker written to each tooling directory with the key it was generated from
+CACHE_FILE = '.bpio_cache'
+
 def check_compiler_availability():
     """Check if flatc and flatcc compilers are available."""
     compilers = {}
     
     # Check flatc
-    try:
-        result = subprocess.run(['flatc', '--version'], 
-                              capture_output=True, text=True, check=True)
-        compilers['flatc'] = result.stdout.strip()
+    compilers['flatc'] = shutil.which('flatc')
+    if compilers['flatc']:
         print(f"Found flatc: {compilers['flatc']}")
-    except (subprocess.CalledProcessError, FileNotFoundError):
+    else:
         print("Warning: flatc compiler not found. Install from https://github.com/google/flatbuffers")
-        compilers['flatc'] = None
     
     # Check flatcc
-    try:
-        result = subprocess.run(['flatcc', '--help'], 
-                              capture_output=True, text=True)
-        if result.returncode == 0 or 'flatcc' in result.stderr.lower():
-            compilers['flatcc'] = "Available"
-            print("Found flatcc compiler")
-        else:
-            raise FileNotFoundError
-    except FileNotFoundError:
+    compilers['flatcc'] = shutil.which('flatcc')
+    if compilers['flatcc']:
+        print(f"Found flatcc: {compilers['flatcc']}")
+    else:
         print("Warning: flatcc compiler not found. Install from https://github.com/dvidelabs/flatcc")
-        compilers['flatcc'] = None
     
     return compilers
 
+@functools.lru_cache(maxsize=None)
+def compiler_version(compiler):
+    """Get the version string reported by a compiler, queried once per run."""
+    try:
+        result = subprocess.run([compiler, '--version'], capture_output=True, text=True)
+        return result.stdout.strip()
+    except OSError:
+        return ''
+
 def find_schema_file(search_paths):
     """Find the BPIO2 schema file."""
     possible_names = ['bpio2.fbs', 'bpio.fbs']
@@ -81,70 +113,177 @@ def find_schema_file(search_paths):
     
     return None
 
-def generate_flatc_tooling(schema_file, output_dir, languages):
-    """Generate tooling for flatc-supported languages."""
+def log(message):
+    """Print a whole line without interleaving with other generator threads."""
+    with _print_lock:
+        print(message)
+
+def cache_key(schema_file, version, options):
+    """Hash the schema contents together with the compiler version and options."""
+    digest = hashlib.sha256(Path(schema_file).read_bytes())
+    digest.update(version.encode())
+    for option in options:
+        digest.update(b'\0' + option.encode())
+    return digest.hexdigest()
+
+def is_up_to_date(lang_dir, key):
+    """Check if a tooling directory was generated from the given cache key."""
+    if key is None:
+        return False
+    try:
+        if (lang_dir / CACHE_FILE).read_text().strip() != key:
+            return False
+        # A marker left behind in an emptied directory doesn't count
+        return count_tooling_files(lang_dir) > 0
+    except OSError:
+        return False
+
+def count_tooling_files(lang_dir):
+    """Count generated files in a tooling directory, ignoring the cache marker."""
+    with os.scandir(lang_dir) as entries:
+        return sum(1 for entry in entries if entry.name != CACHE_FILE)
+
+def run_compiler(cmd):
+    """Run a compiler command, returning (success, stderr).
+    
+    stdout is discarded and stderr is only kept for reporting failures.
+    """
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                text=True)
+        _, stderr = proc.communicate()
+        if proc.returncode != 0:
+            return False, stderr
+        return True, None
+    except Exception as e:
+        return False, str(e)
+
+def _run_flatc(languages, schema_file, staging_dir):
+    """Run flatc once for all languages, returning (success, stderr)."""
+    cmd = ['flatc', *languages.values(), '-o', str(staging_dir), str(schema_file)]
+    return run_compiler(cmd)
+
+def _sort_flatc_output(staging_dir, output_dir, languages):
+    """Move files from a multi-language flatc run into their <lang>/tooling/ directories."""
+    for path in sorted(staging_dir.rglob('*')):
+        if not path.is_file():
+            continue
+        
+        lang = FLATC_EXTENSIONS.get(path.suffix)
+        if lang not in languages:
+            log(f"  ⚠ Ignoring unexpected flatc output: {path.relative_to(staging_dir)}")
+            continue
+        
+        destination = output_dir / lang / 'tooling' / path.relative_to(staging_dir)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(path, destination)
+
+def generate_flatc_tooling(schema_file, output_dir, languages, keys=None):
+    """Generate tooling for flatc-supported languages.
+    
+    Returns the languages with tooling available and the file count for each language.
+    keys maps each language to its cache key, None disables the cache.
+    """
+    keys = keys or {}
+    successful_languages = []
+    file_counts = {}
     if not languages:
-        return True
+        return successful_languages, file_counts
     
     success_count = 0
     total_count = len(languages)
     
+    # Skip languages already generated from this schema and compiler version
+    stale_languages = {}
     for lang, flag in languages.items():
         lang_dir = output_dir / lang / 'tooling'
-        lang_dir.mkdir(parents=True, exist_ok=True)
+        if is_up_to_date(lang_dir, keys.get(lang)):
+            log(f"  ✓ {lang} tooling is up to date in {lang_dir}")
+            file_counts[lang] = count_tooling_files(lang_dir)
+            successful_languages.append(lang)
+            success_count += 1
+        else:
+            stale_languages[lang] = flag
+    
+    if stale_languages:
+        log(f"Generating {', '.join(stale_languages)} tooling...")
+        
+        # flatc writes every language into a single directory, so generate into a
+        # staging directory and sort the results by file extension afterwards
+        with tempfile.TemporaryDirectory(prefix='.flatc_', dir=output_dir) as staging:
+            success, stderr = _run_flatc(stale_languages, schema_file, staging)
+            if success:
+                _sort_flatc_output(Path(staging), output_dir, stale_languages)
         
-        print(f"Generating {lang} tooling...")
+        # A single failing generator fails the whole run, so retry each language
+        # on its own to keep the failure limited to that language
+        failed_languages = set()
+        if not success:
+            log(f"  ⚠ Combined flatc run failed, retrying languages one by one: {stderr.strip()}")
+            for lang, flag in stale_languages.items():
+                with tempfile.TemporaryDirectory(prefix='.flatc_', dir=output_dir) as staging:
+                    lang_success, lang_stderr = _run_flatc({lang: flag}, schema_file, staging)
+                    if lang_success:
+                        _sort_flatc_output(Path(staging), output_dir, {lang: flag})
+                    else:
+                        log(f"  ✗ Failed to generate {lang} tooling: {lang_stderr.strip()}")
+                        failed_languages.add(lang)
         
-        try:
-            cmd = ['flatc', flag, '-o', str(lang_dir), str(schema_file)]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        for lang in stale_languages:
+            lang_dir = output_dir / lang / 'tooling'
+            lang_dir.mkdir(parents=True, exist_ok=True)
+            file_counts[lang] = count_tooling_files(lang_dir)
+            
+            if lang in failed_languages:
+                # Keep reporting tooling left over from a previous run
+                if file_counts[lang]:
+                    successful_languages.append(lang)
+                continue
             
             # Check if files were generated
-            generated_files = list(lang_dir.glob('*'))
-            if generated_files:
-                print(f"  ✓ Generated {len(generated_files)} files in {lang_dir}")
+            if file_counts[lang]:
+                log(f"  ✓ Generated {file_counts[lang]} files in {lang_dir}")
+                if keys.get(lang) is not None:
+                    (lang_dir / CACHE_FILE).write_text(keys[lang])
+                successful_languages.append(lang)
                 success_count += 1
             else:
-                print(f"  ⚠ No files generated for {lang}")
-                
-        except subprocess.CalledProcessError as e:
-            print(f"  ✗ Failed to generate {lang} tooling: {e.stderr}")
-        except Exception as e:
-            print(f"  ✗ Error generating {lang} tooling: {e}")
+                log(f"  ⚠ No files generated for {lang}")
     
-    print(f"flatc: {success_count}/{total_count} languages successful")
-    return success_count == total_count
+    log(f"flatc: {success_count}/{total_count} languages successful")
+    return successful_languages, file_counts
 
-def generate_flatcc_tooling(schema_file, output_dir):
-    """Generate C tooling using flatcc."""
+def generate_flatcc_tooling(schema_file, output_dir, key=None):
+    """Generate C tooling using flatcc, returning (success, file_count)."""
     lang_dir = output_dir / 'c' / 'tooling'
     lang_dir.mkdir(parents=True, exist_ok=True)
     
-    print("Generating C tooling with flatcc...")
+    if is_up_to_date(lang_dir, key):
+        log(f"  ✓ C tooling is up to date in {lang_dir}")
+        return True, count_tooling_files(lang_dir)
     
-    try:
-        cmd = ['flatcc', '-a', '-o', str(lang_dir), str(schema_file)]
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        
-        # Check if files were generated
-        generated_files = list(lang_dir.glob('*'))
-        if generated_files:
-            print(f"  ✓ Generated {len(generated_files)} C files in {lang_dir}")
-            return True
-        else:
-            print(f"  ⚠ No C files generated")
-            return False
-            
-    except subprocess.CalledProcessError as e:
-        print(f"  ✗ Failed to generate C tooling: {e.stderr}")
-        return False
-    except Exception as e:
-        print(f"  ✗ Error generating C tooling: {e}")
-        return False
+    log("Generating C tooling with flatcc...")
+    
+    cmd = ['flatcc', *FLATCC_LANGUAGES['c'], '-o', str(lang_dir), str(schema_file)]
+    success, stderr = run_compiler(cmd)
+    if not success:
+        log(f"  ✗ Failed to generate C tooling: {stderr}")
+        return False, 0
+    
+    # Check if files were generated
+    file_count = count_tooling_files(lang_dir)
+    if file_count:
+        log(f"  ✓ Generated {file_count} C files in {lang_dir}")
+        if key is not None:
+            (lang_dir / CACHE_FILE).write_text(key)
+        return True, file_count
+    else:
+        log(f"  ⚠ No C files generated")
+        return False, 0
 
 def create_readme(output_dir, schema_file, successful_languages):
     """Create a README file documenting the generated tooling."""
-    readme_content = f"""# BPIO2 FlatBuffer Tooling
+    readme_parts = [f"""# BPIO2 FlatBuffer Tooling
 
 This directory contains auto-generated FlatBuffer tooling for the BPIO2 protocol.
 
@@ -156,16 +295,16 @@ See [flatc](https://flatbuffers.dev/quick_start/) for language-specific usage in
 
 ## Source Schema
 - Schema file: {schema_file.name}
-- Generated on: {subprocess.run(['date'], capture_output=True, text=True).stdout.strip() if os.name != 'nt' else 'Windows'}
+- Generated on: {datetime.now().astimezone().isoformat(timespec='seconds')}
 
 ## Generated Languages
 
-"""
+"""]
     
     for lang in sorted(successful_languages):
-        readme_content += f"- **{lang.title()}**: `{lang}/tooling/`\n"
+        readme_parts.append(f"- **{lang.title()}**: `{lang}/tooling/`\n")
     
-    readme_content += f"""
+    readme_parts.append(f"""
 ## Usage
 
 Each language directory contains the generated FlatBuffer code for that language.
@@ -202,11 +341,10 @@ from StatusResponse import StatusResponse
 #include "bpio2_reader.h"
 #include "bpio2_builder.h"
 ```
-"""
+""")
     
     readme_path = output_dir / 'README.md'
-    with open(readme_path, 'w') as f:
-        f.write(readme_content)
+    readme_path.write_text(''.join(readme_parts), encoding='utf-8')
     
     print(f"Created documentation: {readme_path}")
 
@@ -221,6 +359,7 @@ Examples:
   %(prog)s --output ./generated               # Custom output directory
   %(prog)s --languages python go rust        # Generate only specific languages
   %(prog)s --skip-flatcc                      # Skip C tooling generation
+  %(prog)s --no-cache                         # Regenerate even if schema is unchanged
         """
     )
     
@@ -235,6 +374,8 @@ Examples:
                        help='Skip C tooling generation with flatcc')
     parser.add_argument('--force', action='store_true',
                        help='Overwrite existing tooling directories')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Regenerate tooling even if the schema is unchanged')
     
     args = parser.parse_args()
     
@@ -269,31 +410,53 @@ Examples:
     print(f"Output directory: {output_dir}")
     
     successful_languages = []
+    file_counts = {}
+    use_cache = not args.no_cache
     
-    # Generate flatc tooling
-    if compilers['flatc']:
-        languages_to_generate = FLATC_LANGUAGES
-        if args.languages:
-            languages_to_generate = {k: v for k, v in FLATC_LANGUAGES.items() 
-                                   if k in args.languages}
+    # flatc and flatcc write to separate directories, so run them side by side
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        # Generate flatc tooling
+        flatc_future = None
+        if compilers['flatc']:
+            languages_to_generate = FLATC_LANGUAGES
+            if args.languages:
+                languages_to_generate = {k: v for k, v in FLATC_LANGUAGES.items() 
+                                       if k in args.languages}
+            
+            # Each language is keyed on its own flags, so editing one only regenerates that one
+            flatc_keys = None
+            if use_cache:
+                version = compiler_version(compilers['flatc'])
+                flatc_keys = {lang: cache_key(schema_file, version, [flag])
+                              for lang, flag in languages_to_generate.items()}
+            flatc_future = executor.submit(generate_flatc_tooling, schema_file, output_dir,
+                                           languages_to_generate, flatc_keys)
+        else:
+            log("Skipping flatc languages (compiler not available)")
         
-        if generate_flatc_tooling(schema_file, output_dir, languages_to_generate):
-            successful_languages.extend(languages_to_generate.keys())
+        # Generate flatcc tooling
+        flatcc_future = None
+        if not args.skip_flatcc and compilers['flatcc']:
+            flatcc_key = None
+            if use_cache:
+                flatcc_key = cache_key(schema_file, compiler_version(compilers['flatcc']),
+                                       FLATCC_LANGUAGES['c'])
+            flatcc_future = executor.submit(generate_flatcc_tooling, schema_file, output_dir,
+                                            flatcc_key)
+        elif args.skip_flatcc:
+            log("Skipping C tooling (--skip-flatcc specified)")
         else:
-            successful_languages.extend([lang for lang in languages_to_generate.keys()
-                                       if (output_dir / lang / 'tooling').exists() and 
-                                       list((output_dir / lang / 'tooling').glob('*'))])
-    else:
-        print("Skipping flatc languages (compiler not available)")
-    
-    # Generate flatcc tooling
-    if not args.skip_flatcc and compilers['flatcc']:
-        if generate_flatcc_tooling(schema_file, output_dir):
-            successful_languages.append('c')
-    elif args.skip_flatcc:
-        print("Skipping C tooling (--skip-flatcc specified)")
-    else:
-        print("Skipping C tooling (flatcc not available)")
+            log("Skipping C tooling (flatcc not available)")
+        
+        if flatc_future:
+            flatc_languages, flatc_file_counts = flatc_future.result()
+            successful_languages.extend(flatc_languages)
+            file_counts.update(flatc_file_counts)
+        
+        if flatcc_future:
+            flatcc_success, file_counts['c'] = flatcc_future.result()
+            if flatcc_success:
+                successful_languages.append('c')
     
     # Create documentation
     if successful_languages:
@@ -308,9 +471,7 @@ Examples:
     if successful_languages:
         print("Generated tooling for:")
         for lang in sorted(successful_languages):
-            lang_dir = output_dir / lang / 'tooling'
-            file_count = len(list(lang_dir.glob('*'))) if lang_dir.exists() else 0
-            print(f"  - {lang.ljust(12)} ({file_count} files)")
+            print(f"  - {lang.ljust(12)} ({file_counts[lang]} files)")
     else:
         print("No tooling was generated successfully")
         return 1
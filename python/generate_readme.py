@@ -3,9 +3,13 @@
 Generate README.md by running all Python scripts with -h flag
 """
 
+import ast
+import functools
+import importlib.util
 import os
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 def run_script_help(script_path):
@@ -23,37 +27,42 @@ def run_script_help(script_path):
     except Exception as e:
         return "", f"Error: {e}", 1
 
+def get_script_help(script_path):
+    """Get help output from a script's build_parser(), falling back to running it with -h."""
+    try:
+        spec = importlib.util.spec_from_file_location(f"_readme_{script_path.stem}", script_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        parser = module.build_parser()
+    except Exception:
+        return run_script_help(script_path)
+    
+    # Match the output of running the script with -h and stdout redirected
+    formatter_class = parser.formatter_class
+    parser.formatter_class = lambda prog: formatter_class(prog, width=78)
+    parser.prog = script_path.name
+    return parser.format_help(), "", 0
+
 def get_script_description(script_path):
     """Extract description from script docstring."""
+    script_path = Path(script_path)
     try:
-        with open(script_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-        # Look for module docstring
-        lines = content.split('\n')
-        in_docstring = False
-        docstring_lines = []
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith('"""') or line.startswith("'''"):
-                if in_docstring:
-                    break
-                in_docstring = True
-                # Handle single-line docstring
-                if line.count('"""') >= 2 or line.count("'''") >= 2:
-                    desc = line.replace('"""', '').replace("'''", '').strip()
-                    return desc if desc else "Python script"
-                continue
-            elif in_docstring:
-                if line and not line.startswith('#'):
-                    docstring_lines.append(line)
-        
-        if docstring_lines:
-            return docstring_lines[0]
+        return _read_script_description(script_path, script_path.stat().st_mtime_ns)
+    except OSError:
         return "Python script"
-    except:
+
+@functools.lru_cache(maxsize=None)
+def _read_script_description(script_path, mtime):
+    """Parse the first line of a script's module docstring, cached per file version."""
+    try:
+        tree = ast.parse(script_path.read_text(encoding='utf-8'))
+    except (OSError, SyntaxError, ValueError):
         return "Python script"
+    
+    docstring = ast.get_docstring(tree)
+    if not docstring or not docstring.strip():
+        return "Python script"
+    return docstring.strip().splitlines()[0].strip()
 
 def generate_readme(directory_path, output_file='README.md'):
     """Generate README.md from all Python scripts in directory."""
@@ -106,6 +115,13 @@ def generate_readme(directory_path, output_file='README.md'):
     readme_content.append("## Examples and Scripts")
     readme_content.append("")
     
+    # Collect help output in parallel, scripts without build_parser() are run with -h
+    # and the threads just wait on the child processes
+    help_results = {}
+    if python_files:
+        with ThreadPoolExecutor(max_workers=min(8, len(python_files))) as executor:
+            help_results = dict(zip(python_files, executor.map(get_script_help, python_files)))
+    
     for script_path in python_files:
         script_name = script_path.stem
         description = get_script_description(script_path)
@@ -118,7 +134,7 @@ def generate_readme(directory_path, output_file='README.md'):
         readme_content.append("")
         
         # Get help output
-        stdout, stderr, returncode = run_script_help(script_path)
+        stdout, stderr, returncode = help_results[script_path]
         
         if returncode == 0 and stdout:
             readme_content.append("```")
@@ -172,7 +188,7 @@ def generate_readme(directory_path, output_file='README.md'):
     
     readme_content.append("## Requirements")
     readme_content.append("")
-    readme_content.append("- Python 3.6+")
+    readme_content.append("- Python 3.8+")
     readme_content.append("- pyserial library")
     readme_content.append("- COBS library for COBS encoding/decoding")
     readme_content.append("- Bus Pirate with BPIO2 firmware")
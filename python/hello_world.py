@@ -7,19 +7,22 @@ Enter I2C mode, perform some basic operations, and display status.
 import argparse
 import sys
 
-# Import BPIO client and I2C interface
-from pybpio.bpio_client import BPIOClient
+# Import I2C interface, the BPIO client is imported in main()
 from pybpio.bpio_i2c import BPIOI2C
 
-def show_pin_voltages(i2c):
+def pin_voltage_header(i2c):
+    """Build the pin label and separator lines, the labels don't change within a mode."""
+    pin_labels = i2c.get_mode_pin_labels()
+    # Skip first and last labels
+    return (" ".join(f"{label:>8}" for label in pin_labels[1:-1]),
+            " ".join("-" * 8 for _ in pin_labels[1:-1]))
+
+def show_pin_voltages(i2c, header):
     # Show pin voltages
     print("Pin voltages:")
     pin_voltage = i2c.get_adc_mv()
-    pin_labels = i2c.get_mode_pin_labels()
-    # Print header (skip first and last labels)
-    print(" ".join(f"{label:>8}" for label in pin_labels[1:-1]))
-    # Print separator line
-    print(" ".join("-" * 8 for _ in pin_labels[1:-1]))
+    # Print header and separator line
+    print("\n".join(header))
     # Print values with consistent formatting
     print(" ".join(f"{pin_voltage[pin]:>6}mV" for pin in range(8)))
 
@@ -53,7 +56,8 @@ def basic_example(client):
         print(f"Pull-up enabled: {i2c.get_pullup_enabled()}")
 
         # Show pin voltages
-        show_pin_voltages(i2c)    
+        header = pin_voltage_header(i2c)
+        show_pin_voltages(i2c, header)
 
         print("Changing PSU settings...")
         # Change voltage and current settings
@@ -64,7 +68,7 @@ def basic_example(client):
         print(f"New PSU max current: {i2c.get_psu_set_ma()}mA")
 
         # Show pin voltages
-        show_pin_voltages(i2c)
+        show_pin_voltages(i2c, header)
 
         print("All operations completed successfully!")
 
@@ -74,7 +78,8 @@ def basic_example(client):
     
     return True
 
-def main():
+def build_parser():
+    """Build the command line argument parser."""
     parser = argparse.ArgumentParser(
         description='BPIO2 I2C Example - Basic configuration and status display',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -85,9 +90,17 @@ Examples:
     )
     
     parser.add_argument('-p', '--port', required=True,
-                       help='Serial port (e.g., COM3, /dev/ttyUSB0)')    
+                       help='Serial port (e.g., COM3, /dev/ttyUSB0)')
+    
+    return parser
+
+def main():
+    parser = build_parser()
     args = parser.parse_args()
     
+    # Import after parsing so -h does not have to load pyserial and cobs
+    from pybpio.bpio_client import BPIOClient
+    
     try:
         client = BPIOClient(args.port)
         print(f"Connected to Bus Pirate on {args.port}")      
@@ -5,12 +5,15 @@ Demonstrates basic I2C communication with configuration options.
 """
 
 import argparse
+import binascii
 import sys
 
-# Import BPIO client and I2C interface
-from pybpio.bpio_client import BPIOClient
+# Import I2C interface, the BPIO client is imported in main()
 from pybpio.bpio_i2c import BPIOI2C
 
+# Printable ASCII characters map to themselves, everything else to '.'
+_ASCII_TABLE = bytes(b if 32 <= b < 127 else ord('.') for b in range(256))
+
 def i2c_basic_example(client, device_addr=0xA0, register_addr=0x00, read_bytes=8):
     """Basic I2C read example with status display."""
     i2c = BPIOI2C(client)
@@ -34,7 +37,7 @@ def i2c_basic_example(client, device_addr=0xA0, register_addr=0x00, read_bytes=8
         
         if data:
             print(f"Read data: {data.hex()}")
-            print(f"Read data (hex): {' '.join(f'{b:02X}' for b in data)}")
+            print(f"Read data (hex): {data.hex(' ').upper()}")
         else:
             print("Failed to read data from I2C device")
             return False
@@ -57,11 +60,10 @@ def i2c_eeprom_dump(client, device_addr=0xA0, size=256):
         if data:
             print(f"EEPROM dump ({len(data)} bytes):")
             # Print in hex dump format
-            for i in range(0, len(data), 16):
-                addr = i
-                hex_part = ' '.join(f'{data[j]:02X}' for j in range(i, min(i+16, len(data))))
-                ascii_part = ''.join(chr(data[j]) if 32 <= data[j] < 127 else '.' 
-                                   for j in range(i, min(i+16, len(data))))
+            for addr in range(0, len(data), 16):
+                row = data[addr:addr+16]
+                hex_part = binascii.hexlify(row, ' ').decode('ascii').upper()
+                ascii_part = row.translate(_ASCII_TABLE).decode('ascii')
                 print(f"{addr:04X}: {hex_part:<47} {ascii_part}")
         else:
             print("Failed to read EEPROM data")
@@ -72,7 +74,8 @@ def i2c_eeprom_dump(client, device_addr=0xA0, size=256):
     
     return True
 
-def main():
+def build_parser():
+    """Build the command line argument parser."""
     parser = argparse.ArgumentParser(
         description='BPIO2 I2C Example -Read from 24x02 EEPROM',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -95,8 +98,15 @@ Examples:
     parser.add_argument('--dump', action='store_true',
                        help='Dump entire EEPROM contents')
     
+    return parser
+
+def main():
+    parser = build_parser()
     args = parser.parse_args()
     
+    # Import after parsing so -h does not have to load pyserial and cobs
+    from pybpio.bpio_client import BPIOClient
+    
     try:
         client = BPIOClient(args.port)
         print(f"Connected to Bus Pirate on {args.port}")
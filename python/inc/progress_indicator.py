@@ -1,15 +1,35 @@
+import sys
 import time
 
+# Minimum time between redraws, the final update is always drawn
+_UPDATE_INTERVAL = 0.1
+_last_update = 0.0
+
+# Every possible progress bar, indexed by the number of filled cells
+_BAR_LEN = 50
+_BARS = tuple('█' * i + '░' * (_BAR_LEN - i) for i in range(_BAR_LEN + 1))
+
 def show_progress(current, total, start_time, operation_name="Operation", unit="MB"):
-    """Reusable progress indicator function."""
-    progress = current / total
-    bar_length = 50
-    filled_length = int(bar_length * progress)
-    bar = '█' * filled_length + '░' * (bar_length - filled_length)
+    """Reusable progress indicator function.
+    
+    start_time must be a time.monotonic() reading taken when the operation started,
+    a time.time() value would give a meaningless elapsed time and ETA.
+    """
+    global _last_update
+    
+    # Limit redraws to 10 per second
+    now = time.monotonic()
+    if now - _last_update < _UPDATE_INTERVAL and current < total:
+        return
+    _last_update = now
+    
+    progress = current / total if total else 1.0
+    filled_length = min(int(_BAR_LEN * progress), _BAR_LEN)
+    bar = _BARS[filled_length]
     percent = progress * 100
     
     # Calculate elapsed time and estimated time remaining
-    elapsed_time = time.time() - start_time
+    elapsed_time = time.monotonic() - start_time
     if progress > 0:
         estimated_total_time = elapsed_time / progress
         eta = estimated_total_time - elapsed_time
@@ -32,7 +52,8 @@ def show_progress(current, total, start_time, operation_name="Operation", unit="
         size_info = f"({current}{unit}/{total}{unit})"
         speed_info = f"({speed_kbps:.1f}/s)"
     
-    # Print progress on two lines
-    print(f'\r[{bar}] {percent:.1f}%', end='')
-    print(f'\n{size_info} {elapsed_str} elapsed, ETA {eta_str} {speed_info}', end='')
-    print('\033[A', end='', flush=True)  # Move cursor up one line for next update
+    # Print progress on two lines, then move the cursor up one line for the next update
+    sys.stdout.write(f'\r[{bar}] {percent:.1f}%'
+                     f'\n{size_info} {elapsed_str} elapsed, ETA {eta_str} {speed_info}'
+                     '\033[A')
+    sys.stdout.flush()
@@ -5,6 +5,7 @@ Demonstrates 1-Wire communication with temperature sensors.
 """
 
 import argparse
+import struct
 import sys
 import time
 
@@ -12,6 +13,39 @@ import time
 from pybpio.bpio_client import BPIOClient
 from pybpio.bpio_1wire import BPIO1Wire
 
+def _ds_crc8_table():
+    """Build the Dallas/Maxim CRC-8 lookup table (reflected polynomial 0x8C)."""
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x8C if crc & 0x01 else crc >> 1
+        table.append(crc)
+    return bytes(table)
+
+_DS_CRC8 = _ds_crc8_table()
+
+def ds_crc8(data):
+    """Calculate the Dallas/Maxim CRC-8 of data."""
+    crc = 0
+    for b in data:
+        crc = _DS_CRC8[crc ^ b]
+    return crc
+
+# Known 1-Wire family codes
+_ONEWIRE_FAMILIES = {
+    0x10: "DS18S20 (Temperature)",
+    0x28: "DS18B20 (Temperature)",
+    0x22: "DS1822 (Temperature)",
+    0x26: "DS2438 (Smart Battery Monitor)",
+    0x3A: "DS2413 (Dual Channel Switch)"
+}
+
+# DS18B20 transactions, each sent after its own bus reset: SKIP ROM (0xCC) + function command
+_DS18B20_WRITE_SCRATCHPAD = bytes([0xCC, 0x4E, 0x00, 0x00, 0x7F])  # TH, TL, 12-bit config
+_DS18B20_CONVERT_T = bytes([0xCC, 0x44])
+_DS18B20_READ_SCRATCHPAD = bytes([0xCC, 0xBE])
+
 def onewire_read_temperature(client, voltage=5000):
     """Read temperature from DS18B20 sensor."""
     onewire = BPIO1Wire(client)
@@ -23,11 +57,11 @@ def onewire_read_temperature(client, voltage=5000):
         
         # Configure DS18B20 scratchpad (optional)
         print("Configuring DS18B20 sensor...")
-        onewire.transfer(write_data=[0xCC, 0x4E, 0x00, 0x00, 0x7F])
+        onewire.transfer(write_data=_DS18B20_WRITE_SCRATCHPAD)
         
         # Start temperature conversion
         print("Starting temperature conversion...")
-        onewire.transfer(write_data=[0xCC, 0x44])
+        onewire.transfer(write_data=_DS18B20_CONVERT_T)
         
         # Wait for conversion (750ms for 12-bit resolution)
         print("Waiting for conversion (750ms)...")
@@ -35,17 +69,11 @@ def onewire_read_temperature(client, voltage=5000):
         
         # Read scratchpad
         print("Reading temperature data...")
-        data = onewire.transfer(write_data=[0xCC, 0xBE], read_bytes=9)
+        data = onewire.transfer(write_data=_DS18B20_READ_SCRATCHPAD, read_bytes=9)
         
         if data and len(data) >= 2:
-            # Convert temperature (first two bytes)
-            temp_lsb = data[0]
-            temp_msb = data[1]
-            temp_raw = (temp_msb << 8) | temp_lsb
-            
-            # Handle negative temperatures (two's complement)
-            if temp_raw & 0x8000:
-                temp_raw = -((temp_raw ^ 0xFFFF) + 1)
+            # Convert temperature (first two bytes, signed little endian)
+            temp_raw = struct.unpack_from('<h', data)[0]
             
             # Convert to Celsius (12-bit resolution = 0.0625°C per bit)
             temperature_c = temp_raw / 16.0
@@ -102,20 +130,13 @@ def onewire_search_devices(client, voltage=5000):
                 print(f"  Family Code: 0x{family_code:02X}")
                 print(f"  Serial Number: {' '.join(f'{b:02X}' for b in serial_number)}")
                 print(f"  CRC: 0x{crc:02X}")
+                expected_crc = ds_crc8(rom_data[:7])
+                if expected_crc != crc:
+                    print(f"  Warning: CRC mismatch, expected 0x{expected_crc:02X}")
                 
                 # Decode family codes
-                families = {
-                    0x10: "DS18S20 (Temperature)",
-                    0x28: "DS18B20 (Temperature)", 
-                    0x22: "DS1822 (Temperature)",
-                    0x26: "DS2438 (Smart Battery Monitor)",
-                    0x3A: "DS2413 (Dual Channel Switch)"
-                }
-                
-                if family_code in families:
-                    print(f"  Device Type: {families[family_code]}")
-                else:
-                    print(f"  Device Type: Unknown family 0x{family_code:02X}")
+                device_type = _ONEWIRE_FAMILIES.get(family_code, f"Unknown family 0x{family_code:02X}")
+                print(f"  Device Type: {device_type}")
                     
             else:
                 print("Failed to read ROM (multiple devices on bus?)")
@@ -128,7 +149,8 @@ def onewire_search_devices(client, voltage=5000):
     
     return True
 
-def main():
+def build_parser():
+    """Build the command line argument parser."""
     parser = argparse.ArgumentParser(
         description='BPIO2 1-Wire Example - Communicate with 1-Wire devices',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -146,13 +168,22 @@ Examples:
                        help='Supply voltage in mV (default: 5000)')
     parser.add_argument('--search', action='store_true',
                        help='Search for devices instead of reading temperature')
+    parser.add_argument('--low-latency', action='store_true',
+                       help='Reduce serial port latency (Linux, may require root)')
     
+    return parser
+
+def main():
+    parser = build_parser()
     args = parser.parse_args()
     
     try:
         client = BPIOClient(args.port)
         print(f"Connected to Bus Pirate on {args.port}")
         
+        if args.low_latency and not client.set_low_latency():
+            print("Low latency mode is not available on this port")
+        
         if args.search:
             success = onewire_search_devices(client, args.voltage)
         else:
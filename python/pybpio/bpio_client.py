@@ -47,6 +47,43 @@ class BPIOClient:
             print(f"Error opening serial port: {e}")
             raise
     
+    def set_low_latency(self):
+        """Reduce serial receive latency, returns True if any setting was changed"""
+        tuned = False
+        
+        # USB serial adapters such as FTDI hold received data for latency_timer ms (16 by default)
+        device = os.path.basename(os.path.realpath(self.port))
+        latency_timer = f"/sys/bus/usb-serial/devices/{device}/latency_timer"
+        if os.path.exists(latency_timer):
+            try:
+                with open(latency_timer, 'w') as f:
+                    f.write('1')
+                tuned = True
+                if self.debug:
+                    print(f"Set {latency_timer} to 1 ms")
+            except PermissionError:
+                print(f"Permission denied writing {latency_timer}, try: echo 1 | sudo tee {latency_timer}")
+            except OSError as e:
+                if self.debug:
+                    print(f"Could not set {latency_timer}: {e}")
+        
+        # Linux tty low_latency flag, the same as `setserial <port> low_latency`
+        if hasattr(self.serial_port, 'set_low_latency_mode'):
+            try:
+                self.serial_port.set_low_latency_mode(True)
+                tuned = True
+                if self.debug:
+                    print(f"Enabled low latency mode on {self.port}")
+            except (ValueError, NotImplementedError, OSError) as e:
+                # USB CDC ports (ttyACM, the Bus Pirate's native USB) don't support the flag,
+                # and pyserial only implements it on Linux
+                if self.debug:
+                    print(f"Low latency mode not available on {self.port}: {e}")
+        elif sys.platform == 'win32':
+            print("On Windows set the adapter latency in Device Manager, e.g. the FTDI LatencyTimer under Port Settings > Advanced")
+        
+        return tuned
+    
     def __enter__(self):
         """Context manager entry"""
         return self
@@ -1,3 +1,5 @@
+import time
+
 from .bpio_base import BPIOBase
 
 class BPIOSPI(BPIOBase):
@@ -82,4 +84,27 @@ class BPIOSPI(BPIOBase):
             data_write=write_data,
             bytes_read=read_bytes,
             stop_main=True
-        )
\ No newline at end of file
+        )
+
+    def wait_for_status(self, write_data, mask, polarity=False, timeout=None,
+                        min_delay=50e-6, max_delay=0.01, on_busy=None):
+        """Poll a status register until the masked bits match polarity, returns False on timeout"""
+        if not self.config_check():
+            return False
+        
+        # The firmware has no wait primitive, so poll from the host and double the delay on each miss
+        expected = mask if polarity else 0
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = min_delay
+        while True:
+            status_data = self.transfer(write_data=write_data, read_bytes=1)
+            if status_data and len(status_data) == 1 and (status_data[0] & mask) == expected:
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            
+            time.sleep(delay)
+            delay = min(delay * 2, max_delay)
+            
+            if on_busy:
+                on_busy()
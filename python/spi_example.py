@@ -84,7 +84,8 @@ def spi_read_status(client, speed=1000000):
         print("Failed to configure SPI interface")
         return False
 
-def main():
+def build_parser():
+    """Build the command line argument parser."""
     parser = argparse.ArgumentParser(
         description='BPIO2 SPI Example - Communicate with SPI flash memory',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -103,6 +104,10 @@ Examples:
     parser.add_argument('--status', action='store_true',
                        help='Read status register instead of JEDEC ID')
     
+    return parser
+
+def main():
+    parser = build_parser()
     args = parser.parse_args()
     
     try:
@@ -5,15 +5,31 @@ Demonstrates reading entire flash memory with progress indication.
 """
 
 import argparse
+import struct
 import sys
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 # Import BPIO client and SPI interface
 from pybpio.bpio_client import BPIOClient
 from pybpio.bpio_spi import BPIOSPI
 from inc.progress_indicator import show_progress
 
-def read_spi_flash(client, filename, flash_size, speed, chunk_size):
+# Number of read requests queued ahead of the file writer
+PIPELINE_DEPTH = 4
+
+# Read size limit used when the Bus Pirate doesn't report mode_max_read
+FALLBACK_MAX_READ = 4096
+
+# Flash command header: opcode + 24-bit address, so only the first 16MB can be addressed
+_FLASH_CMD = struct.Struct('>B3s')
+MAX_FLASH_SIZE = 1 << 24
+
+# Output is flushed to disk in large blocks instead of once per chunk
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+def read_spi_flash(client, filename, flash_size, speed, chunk_size, pipeline_depth=PIPELINE_DEPTH):
     """Read SPI flash memory to file with progress indication."""
     spi = BPIOSPI(client)
     
@@ -22,35 +38,70 @@ def read_spi_flash(client, filename, flash_size, speed, chunk_size):
                     psu_set_ma=0, pullup_enable=True):
         
         print(f"SPI configured at {speed/1000000:.1f}MHz")
+        
+        # Use the largest read the firmware accepts in a single request, falling
+        # back to a conservative limit if it doesn't report one
+        status = client.status_request()
+        max_read = (status.get('mode_max_read') if status else None) or FALLBACK_MAX_READ
+        if chunk_size > max_read:
+            print(f"Chunk size limited to {max_read} bytes")
+            chunk_size = max_read
+        
         print(f"Reading {flash_size//(1024*1024)}MB flash to '{filename}'...")
         print(f"Chunk size: {chunk_size} bytes")
         
-        with open(filename, 'wb') as f:
+        # A single worker keeps serial port access in order, while the next reads
+        # are already queued so the port never waits on the file writer
+        with open(filename, 'wb', buffering=WRITE_BUFFER_SIZE) as f, \
+                ThreadPoolExecutor(max_workers=1) as executor:
             address = 0
+            next_address = 0
             chunk_count = 0
-            start_time = time.time()
-            total_chunks = flash_size // chunk_size
+            start_time = time.monotonic()
+            next_report = 1
+            pending = deque()
+            
+            # Look these up once rather than on every chunk
+            submit = executor.submit
+            transfer = spi.transfer
+            pack_cmd = _FLASH_CMD.pack
+            write = f.write
             
             while address < flash_size:
-                # Prepare read command: 0x03 + 24-bit address
-                cmd = [0x03, (address >> 16) & 0xFF, (address >> 8) & 0xFF, address & 0xFF]
+                # Keep up to pipeline_depth reads in flight
+                while next_address < flash_size and len(pending) < pipeline_depth:
+                    # Prepare read command: 0x03 + 24-bit address
+                    cmd = pack_cmd(0x03, next_address.to_bytes(3, 'big'))
+                    read_len = min(chunk_size, flash_size - next_address)
+                    pending.append(submit(transfer, write_data=cmd, read_bytes=read_len))
+                    next_address += read_len
                 
-                # Read chunk
-                data = spi.transfer(write_data=cmd, read_bytes=chunk_size)
-                
-                if data and len(data) == chunk_size:
-                    f.write(data)
-                    address += chunk_size
+                # Read chunk, the last one may be shorter than chunk_size
+                read_len = min(chunk_size, flash_size - address)
+                try:
+                    data = pending.popleft().result()
+                except Exception:
+                    for future in pending:
+                        future.cancel()
+                    raise
+
+                if data and len(data) == read_len:
+                    write(data)
+                    address += read_len
                     chunk_count += 1
                     
-                    # Update progress every 256 chunks or at end
-                    if chunk_count == 1 or chunk_count % 256 == 0 or chunk_count == total_chunks:
+                    # Update progress every 256 chunks
+                    if chunk_count >= next_report:
                         show_progress(address, flash_size, start_time, "Reading")
+                        next_report = chunk_count + 256
                 else:
                     print(f"\nError: Failed to read at address 0x{address:06X}")
+                    for future in pending:
+                        future.cancel()
                     return False
             
-            total_time = time.time() - start_time
+            show_progress(address, flash_size, start_time, "Reading")
+            total_time = time.monotonic() - start_time
             total_time_str = f"{int(total_time//60):02d}:{int(total_time%60):02d}"
             average_speed = (address / (1024 * 1024)) / total_time
             
@@ -63,7 +114,8 @@ def read_spi_flash(client, filename, flash_size, speed, chunk_size):
     
     return True
 
-def main():
+def build_parser():
+    """Build the command line argument parser."""
     parser = argparse.ArgumentParser(
         description='BPIO2 SPI Flash Reader - Read flash memory to file',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -71,13 +123,14 @@ def main():
 Flash Size Examples:
   1MB   = 1048576      8MB  = 8388608
   2MB   = 2097152      16MB = 16777216  
-  4MB   = 4194304      32MB = 33554432
+  4MB   = 4194304
 
 Examples:
   %(prog)s -p COM3 -o flash.bin                    # Read 16MB flash (default)
   %(prog)s -p COM3 -o flash.bin --size 4194304     # Read 4MB flash
   %(prog)s -p COM3 -o flash.bin --speed 12000000   # Read at 12MHz
-  %(prog)s -p COM3 -o flash.bin --chunk 1024       # Use 1KB chunks
+  %(prog)s -p COM3 -o flash.bin --chunk 32768      # Use 32KB chunks
+  %(prog)s -p COM3 -o flash.bin --pipeline-depth 8 # Queue 8 reads ahead
         """
     )
     
@@ -86,12 +139,20 @@ Examples:
     parser.add_argument('-o', '--output', required=True,
                        help='Output filename for flash dump')
     parser.add_argument('--size', type=int, default=16*1024*1024,
-                       help='Flash size in bytes (default: 16777216 = 16MB)')
+                       help='Flash size in bytes, at most 16MB (default: 16777216 = 16MB)')
     parser.add_argument('--speed', type=int, default=12*1000*1000,
                        help='SPI clock speed in Hz (default: 12000000 = 12MHz)')
-    parser.add_argument('--chunk', type=int, default=512,
-                       help='Read chunk size in bytes (default: 512)')
+    parser.add_argument('--chunk', type=int, default=4096,
+                       help='Read chunk size in bytes, limited to the Bus Pirate maximum (default: 4096)')
+    parser.add_argument('--pipeline-depth', type=int, default=PIPELINE_DEPTH,
+                       help=f'Number of read requests kept in flight (default: {PIPELINE_DEPTH})')
+    parser.add_argument('--low-latency', action='store_true',
+                       help='Reduce serial port latency (Linux, may require root)')
     
+    return parser
+
+def main():
+    parser = build_parser()
     args = parser.parse_args()
     
     # Validate arguments
@@ -99,15 +160,27 @@ Examples:
         print("Error: Flash size must be positive")
         return 1
     
-    if args.chunk <= 0 or args.chunk > 4096:
-        print("Error: Chunk size must be between 1 and 4096 bytes")
+    if args.size > MAX_FLASH_SIZE:
+        print(f"Error: Flash size must be at most {MAX_FLASH_SIZE} bytes (16MB) with 3-byte addressing")
+        return 1
+    
+    if args.chunk <= 0:
+        print("Error: Chunk size must be positive")
+        return 1
+    
+    if args.pipeline_depth <= 0:
+        print("Error: Pipeline depth must be positive")
         return 1
     
     try:
         client = BPIOClient(args.port)
         print(f"Connected to Bus Pirate on {args.port}")
         
-        success = read_spi_flash(client, args.output, args.size, args.speed, args.chunk)
+        if args.low_latency and not client.set_low_latency():
+            print("Low latency mode is not available on this port")
+        
+        success = read_spi_flash(client, args.output, args.size, args.speed, args.chunk,
+                                 args.pipeline_depth)
         
         client.close()
         return 0 if success else 1
@@ -5,19 +5,46 @@ Demonstrates writing files to flash with erase and verification.
 """
 
 import argparse
+import mmap
 import sys
 import os
+import struct
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 # Import BPIO client and SPI interface
 from pybpio.bpio_client import BPIOClient
 from pybpio.bpio_spi import BPIOSPI
 from inc.progress_indicator import show_progress
 
+# Number of page programs queued ahead of the file reader
+PIPELINE_DEPTH = 4
+
+# Flash command header: opcode + 24-bit address, so only the first 16MB can be addressed
+_FLASH_CMD = struct.Struct('>B3s')
+MAX_FLASH_SIZE = 1 << 24
+
+# Page program status polling backoff and timeout, in seconds
+POLL_MIN_DELAY = 50e-6
+POLL_MAX_DELAY = 500e-6
+PROGRAM_TIMEOUT = 1.0
+
+# Chip erase takes seconds to minutes, so polling backs off much further
+ERASE_POLL_MIN_DELAY = 100e-6
+ERASE_POLL_MAX_DELAY = 1.0
+ERASE_TIMEOUT = 600.0
+
+# Standard SPI flash page size
+PAGE_SIZE = 256
+
+# Contents of an erased page, programming these bytes would not change anything
+_ERASED_PAGE = b'\xff' * PAGE_SIZE
+
 def erase_flash(spi):
     """Erase entire flash chip."""
     print("Erasing flash chip (this may take several minutes)...")
-    start_time = time.time()
+    start_time = time.monotonic()
     
     # Write enable
     spi.transfer(write_data=[0x06])
@@ -26,95 +53,143 @@ def erase_flash(spi):
     spi.transfer(write_data=[0xC7])
     
     # Wait for erase completion
-    while True:
-        status_data = spi.transfer(write_data=[0x05], read_bytes=1)
-        if status_data and len(status_data) == 1:
-            if (status_data[0] & 0x01) == 0:  # WIP bit cleared
-                break
-        time.sleep(0.1)
-        
-        elapsed = time.time() - start_time
+    def show_elapsed():
+        elapsed = time.monotonic() - start_time
         print(f'\rErasing... {elapsed:.1f}s elapsed', end='', flush=True)
     
-    total_time = time.time() - start_time
+    if not spi.wait_for_status(write_data=[0x05], mask=0x01, timeout=ERASE_TIMEOUT,
+                               min_delay=ERASE_POLL_MIN_DELAY, max_delay=ERASE_POLL_MAX_DELAY,
+                               on_busy=show_elapsed):
+        print("\nError: Chip erase timed out")
+        return False
+    
+    total_time = time.monotonic() - start_time
     print(f"\nErase completed in {total_time:.1f}s")
     return True
 
+def program_page(spi, address, page_data, cmd_buf, verify=False):
+    """Program one page and wait for the flash to finish, returning the read back page when verifying."""
+    # Write enable
+    spi.transfer(write_data=[0x06])
+    
+    # Page program: 0x02 + 24-bit address + data, built in place in cmd_buf
+    end = 4 + len(page_data)
+    _FLASH_CMD.pack_into(cmd_buf, 0, 0x02, address.to_bytes(3, 'big'))
+    cmd_buf[4:end] = page_data
+    spi.transfer(write_data=memoryview(cmd_buf)[:end])
+    
+    # Wait for write completion (WIP bit cleared)
+    if not spi.wait_for_status(write_data=[0x05], mask=0x01, timeout=PROGRAM_TIMEOUT,
+                               min_delay=POLL_MIN_DELAY, max_delay=POLL_MAX_DELAY):
+        raise TimeoutError(f"Page program timed out at address 0x{address:06X}")
+    
+    if not verify:
+        return None
+    
+    return read_page(spi, address, len(page_data), cmd_buf)
+
+def read_page(spi, address, length, cmd_buf):
+    """Read back a written page for verification."""
+    # Read: 0x03 + 24-bit address
+    _FLASH_CMD.pack_into(cmd_buf, 0, 0x03, address.to_bytes(3, 'big'))
+    return spi.transfer(write_data=memoryview(cmd_buf)[:4], read_bytes=length)
+
+def cancel_pages(pending):
+    """Cancel queued page programs that have not started yet."""
+    for _, future in pending:
+        future.cancel()
+
+def finish_page(pending, expected):
+    """Wait for the oldest queued page and check it against the expected data, if any."""
+    page_address, future = pending.popleft()
+    try:
+        actual_data = future.result()
+    except TimeoutError:
+        print(f"\nError: Page program timed out at address 0x{page_address:06X}")
+        cancel_pages(pending)
+        return False
+    except Exception:
+        cancel_pages(pending)
+        raise
+    
+    expected_data = expected.pop(page_address, None)
+    if expected_data is not None and actual_data != expected_data:
+        print(f"\nVerification failed at address 0x{page_address:06X}")
+        cancel_pages(pending)
+        return False
+    
+    return True
+
 def write_flash(spi, filename, verify=True):
     """Write file to flash with optional verification."""
     file_size = os.path.getsize(filename)
-    page_size = 256  # Standard SPI flash page size
     
     print(f"Writing {file_size//(1024*1024):.1f}MB from '{filename}' to flash...")
     
+    # Map the file and slice pages out of it without copying. The mapping is
+    # released with the last page view (an empty file can't be mapped)
     with open(filename, 'rb') as f:
+        data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if file_size else b'')
+    
+    # Pages are programmed in order by a single worker, while the main thread
+    # queues the next pages and checks the ones already written
+    with ThreadPoolExecutor(max_workers=1) as executor:
         address = 0
-        start_time = time.time()
-        total_pages = (file_size + page_size - 1) // page_size
+        start_time = time.monotonic()
         page_count = 0
+        skipped_pages = 0
+        next_report = 1
+        pending = deque()
+        expected = {}
+        
+        # Only the worker touches this buffer, one page at a time
+        cmd_buf = bytearray(4 + PAGE_SIZE)
+        
+        # Look these up once rather than on every page
+        submit = executor.submit
+        is_erased = _ERASED_PAGE.startswith
         
         while address < file_size:
-            # Read page from file
-            page_data = f.read(page_size)
+            # Next page of the file
+            page_data = data[address:address + PAGE_SIZE]
             if not page_data:
                 break
             
-            # Write enable
-            spi.transfer(write_data=[0x06])
-            
-            # Page program: 0x02 + 24-bit address + data
-            cmd = [0x02, (address >> 16) & 0xFF, (address >> 8) & 0xFF, address & 0xFF]
-            cmd.extend(page_data)
-            spi.transfer(write_data=cmd)
+            # Erased (all 0xFF) pages are left as they are and only read back when verifying
+            if is_erased(page_data):
+                skipped_pages += 1
+                task = (read_page, spi, address, len(page_data), cmd_buf) if verify else None
+            else:
+                task = (program_page, spi, address, page_data, cmd_buf, verify)
             
-            # Wait for write completion
-            while True:
-                status_data = spi.transfer(write_data=[0x05], read_bytes=1)
-                if status_data and len(status_data) == 1:
-                    if (status_data[0] & 0x01) == 0:  # WIP bit cleared
-                        break
-                time.sleep(0.001)
+            if task:
+                # Wait for the oldest page before queueing more than PIPELINE_DEPTH
+                if len(pending) >= PIPELINE_DEPTH and not finish_page(pending, expected):
+                    return False
+                pending.append((address, submit(*task)))
+                if verify:
+                    expected[address] = page_data
             
             address += len(page_data)
             page_count += 1
             
-            # Update progress every 64 pages or at end
-            if page_count == 1 or page_count % 64 == 0 or page_count == total_pages:
+            # Update progress every 64 pages
+            if page_count >= next_report:
                 show_progress(address, file_size, start_time, "Writing")
+                next_report = page_count + 64
         
-        write_time = time.time() - start_time
-        print(f"\nWrite completed in {write_time:.1f}s")
-    
-    # Verification
-    if verify:
-        print("Verifying written data...")
-        verify_start = time.time()
-        
-        with open(filename, 'rb') as f:
-            address = 0
-            verify_chunk = 512
-            
-            while address < file_size:
-                expected_data = f.read(verify_chunk)
-                if not expected_data:
-                    break
-                
-                # Read from flash
-                cmd = [0x03, (address >> 16) & 0xFF, (address >> 8) & 0xFF, address & 0xFF]
-                actual_data = spi.transfer(write_data=cmd, read_bytes=len(expected_data))
-                
-                if actual_data != expected_data:
-                    print(f"\nVerification failed at address 0x{address:06X}")
-                    return False
-                
-                address += len(expected_data)
-                
-                # Show progress every 64KB
-                if address % (64 * 1024) == 0 or address >= file_size:
-                    show_progress(address, file_size, verify_start, "Verifying")
+        while pending:
+            if not finish_page(pending, expected):
+                return False
         
-        verify_time = time.time() - verify_start
-        print(f"\nVerification completed successfully in {verify_time:.1f}s")
+        show_progress(address, file_size, start_time, "Writing")
+        write_time = time.monotonic() - start_time
+        if verify:
+            print(f"\nWrite and verification completed successfully in {write_time:.1f}s")
+        else:
+            print(f"\nWrite completed in {write_time:.1f}s")
+        if skipped_pages:
+            print(f"Skipped {skipped_pages} blank (0xFF) pages out of {page_count}")
     
     return True
 
@@ -130,6 +205,10 @@ def write_spi_flash(client, filename, flash_size, speed, erase_chip, verify):
         print(f"Error: File size ({file_size} bytes) exceeds flash capacity ({flash_size} bytes)")
         return False
     
+    if file_size > MAX_FLASH_SIZE:
+        print(f"Error: File size ({file_size} bytes) exceeds the 16MB reachable with 3-byte addressing")
+        return False
+    
     spi = BPIOSPI(client)
     
     if spi.configure(speed=speed, clock_polarity=False, clock_phase=False,
@@ -147,7 +226,8 @@ def write_spi_flash(client, filename, flash_size, speed, erase_chip, verify):
         print("Failed to configure SPI interface")
         return False
 
-def main():
+def build_parser():
+    """Build the command line argument parser."""
     parser = argparse.ArgumentParser(
         description='BPIO2 SPI Flash Writer - Write file to flash memory',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -172,13 +252,22 @@ Examples:
                        help='Skip chip erase (faster but may have old data)')
     parser.add_argument('--no-verify', action='store_true',
                        help='Skip verification after writing (faster)')
+    parser.add_argument('--low-latency', action='store_true',
+                       help='Reduce serial port latency (Linux, may require root)')
     
+    return parser
+
+def main():
+    parser = build_parser()
     args = parser.parse_args()
     
     try:
         client = BPIOClient(args.port)
         print(f"Connected to Bus Pirate on {args.port}")
         
+        if args.low_latency and not client.set_low_latency():
+            print("Low latency mode is not available on this port")
+        
         success = write_spi_flash(client, args.input, args.size, args.speed,
                                  not args.no_erase, not args.no_verify)
         
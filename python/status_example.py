@@ -6,10 +6,55 @@ Demonstrates how to read and display various status information.
 
 import argparse
 import sys
+from dataclasses import dataclass, fields
+from typing import Optional, Sequence, Union
 
 # Import BPIO client
 from pybpio.bpio_client import BPIOClient
 
+@dataclass(frozen=True)
+class Status:
+    """Status report fields, with defaults for anything the firmware leaves out."""
+    error: Optional[str] = None
+    version_flatbuffers_major: Union[int, str] = 'Unknown'
+    version_flatbuffers_minor: Union[int, str] = 'Unknown'
+    version_hardware_major: Union[int, str] = 'Unknown'
+    version_hardware_minor: Union[int, str] = 'Unknown'
+    version_firmware_major: Union[int, str] = 'Unknown'
+    version_firmware_minor: Union[int, str] = 'Unknown'
+    version_firmware_git_hash: str = 'Unknown'
+    version_firmware_date: str = 'Unknown'
+    modes_available: Sequence[str] = ()
+    mode_current: Optional[str] = 'Unknown'
+    mode_pin_labels: Sequence[str] = ()
+    mode_bitorder_msb: bool = False
+    mode_max_packet_size: Union[int, str] = 'Unknown'
+    mode_max_write: Union[int, str] = 'Unknown'
+    mode_max_read: Union[int, str] = 'Unknown'
+    psu_enabled: bool = False
+    psu_set_mv: int = 0
+    psu_set_ma: int = 0
+    psu_measured_mv: int = 0
+    psu_measured_ma: int = 0
+    psu_current_error: bool = False
+    pullup_enabled: bool = False
+    adc_mv: Sequence[int] = ()
+    io_direction: int = 0
+    io_value: int = 0
+    disk_size_mb: Optional[float] = None
+    disk_used_mb: Optional[float] = None
+    led_count: Optional[int] = None
+    
+    @classmethod
+    def from_dict(cls, status):
+        """Build a Status from a status_request() dictionary."""
+        return cls(**{k: v for k, v in status.items() if k in _STATUS_FIELDS})
+
+_STATUS_FIELDS = frozenset(f.name for f in fields(Status))
+
+# Pin state text, indexed by (direction bit << 1) | value bit
+_PIN_STATES = ('IN, LOW', 'IN, HIGH', 'OUT, LOW', 'OUT, HIGH')
+
 def show_detailed_status(client):
     """Display detailed status information."""
     print("=== Bus Pirate Status Information ===\n")
@@ -21,75 +66,78 @@ def show_detailed_status(client):
         print("Failed to retrieve status.")
         return False
     
-    if status.get('error'):
-        print(f"Error getting status: {status['error']}")
+    status = Status.from_dict(status)
+    
+    if status.error:
+        print(f"Error getting status: {status.error}")
         return False
 
     # Flatbuffers Version
     print("Flatbuffers Information:")
-    print(f"  Version: {status.get('version_flatbuffers_major', 'Unknown')}.{status.get('version_flatbuffers_minor', 'Unknown')}")
+    print(f"  Version: {status.version_flatbuffers_major}.{status.version_flatbuffers_minor}")
     
     # Hardware Information
     print("\nHardware Information:")
-    print(f"  Version: {status.get('version_hardware_major', 'Unknown')}.{status.get('version_hardware_minor', 'Unknown')}")
+    print(f"  Version: {status.version_hardware_major}.{status.version_hardware_minor}")
     
     # Firmware Information  
     print(f"\nFirmware Information:")
-    print(f"  Version: {status.get('version_firmware_major', 'Unknown')}.{status.get('version_firmware_minor', 'Unknown')}")
-    print(f"  Git Hash: {status.get('version_firmware_git_hash', 'Unknown')}")
-    print(f"  Build Date: {status.get('version_firmware_date', 'Unknown')}")
+    print(f"  Version: {status.version_firmware_major}.{status.version_firmware_minor}")
+    print(f"  Git Hash: {status.version_firmware_git_hash}")
+    print(f"  Build Date: {status.version_firmware_date}")
     
     # Current Mode
     print(f"\nMode Information:")
-    print(f"  Current Mode: {status.get('mode_current', 'Unknown')}")
-    print(f"  Available Modes: {', '.join(status.get('modes_available', []))}")
-    print(f"  Bit Order MSB: {status.get('mode_bitorder_msb', False)}")
-    print(f"  Max Packet Size: {status.get('mode_max_packet_size', 'Unknown')} bytes")
-    print(f"  Max Write Size: {status.get('mode_max_write', 'Unknown')} bytes")
-    print(f"  Max Read Size: {status.get('mode_max_read', 'Unknown')} bytes")
+    print(f"  Current Mode: {status.mode_current}")
+    print(f"  Available Modes: {', '.join(status.modes_available)}")
+    print(f"  Bit Order MSB: {status.mode_bitorder_msb}")
+    print(f"  Max Packet Size: {status.mode_max_packet_size} bytes")
+    print(f"  Max Write Size: {status.mode_max_write} bytes")
+    print(f"  Max Read Size: {status.mode_max_read} bytes")
     
     # Pin Labels
-    pin_labels = status.get('mode_pin_labels', [])
+    pin_labels = status.mode_pin_labels
     if pin_labels:
         print(f"  Pin Labels: {', '.join(pin_labels)}")
     
     # Power Supply
     print(f"\nPower Supply:")
-    print(f"  Enabled: {status.get('psu_enabled', False)}")
-    print(f"  Set Voltage: {status.get('psu_set_mv', 0)} mV")
-    print(f"  Set Current: {status.get('psu_set_ma', 0)} mA")
-    print(f"  Measured Voltage: {status.get('psu_measured_mv', 0)} mV")
-    print(f"  Measured Current: {status.get('psu_measured_ma', 0)} mA")
-    print(f"  Over Current Error: {status.get('psu_current_error', False)}")
+    print(f"  Enabled: {status.psu_enabled}")
+    print(f"  Set Voltage: {status.psu_set_mv} mV")
+    print(f"  Set Current: {status.psu_set_ma} mA")
+    print(f"  Measured Voltage: {status.psu_measured_mv} mV")
+    print(f"  Measured Current: {status.psu_measured_ma} mA")
+    print(f"  Over Current Error: {status.psu_current_error}")
     
     # Pull-up Resistors
     print(f"\nPull-up Resistors:")
-    print(f"  Enabled: {status.get('pullup_enabled', False)}")
+    print(f"  Enabled: {status.pullup_enabled}")
     
     # IO Pins
-    io_direction = status.get('io_direction', 0)
-    io_value = status.get('io_value', 0)
+    io_direction = status.io_direction
+    io_value = status.io_value
     print(f"\nIO Pins:")
     print(f"  Directions: 0x{io_direction:02X} ({io_direction:08b})")
     print(f"  Values: 0x{io_value:02X} ({io_value:08b})")
     
     # Individual pin status
     print("  Pin Status:")
+    pin_lines = []
     for i in range(8):
-        direction = "OUT" if (io_direction >> i) & 1 else "IN"
-        value = "HIGH" if (io_value >> i) & 1 else "LOW"
-        print(f"    IO{i}: {direction}, {value}")
+        state = _PIN_STATES[(io_direction >> i & 1) << 1 | (io_value >> i & 1)]
+        pin_lines.append(f"    IO{i}: {state}")
+    print('\n'.join(pin_lines))
     
     # ADC Values
-    adc_values = status.get('adc_mv', [])
+    adc_values = status.adc_mv
     if adc_values:
         print(f"\nADC Values (mV):")
         for i, voltage in enumerate(adc_values):
             print(f"  IO{i}: {voltage} mV")
     
     # Storage
-    disk_size = status.get('disk_size_mb')
-    disk_used = status.get('disk_used_mb')
+    disk_size = status.disk_size_mb
+    disk_used = status.disk_used_mb
     if disk_size is not None:
         print(f"\nStorage:")
         print(f"  Total Size: {disk_size:.2f} MB")
@@ -98,14 +146,15 @@ def show_detailed_status(client):
         print(f"  Used: {(disk_used/disk_size)*100:.1f}%")
     
     # LEDs
-    led_count = status.get('led_count')
+    led_count = status.led_count
     if led_count is not None:
         print(f"\nLEDs:")
         print(f"  Count: {led_count}")
     
     return True
 
-def main():
+def build_parser():
+    """Build the command line argument parser."""
     parser = argparse.ArgumentParser(
         description='BPIO2 Status Example - Display Bus Pirate status',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -121,6 +170,10 @@ Examples:
     parser.add_argument('--simple', action='store_true',
                        help='Show simple status output')
     
+    return parser
+
+def main():
+    parser = build_parser()
     args = parser.parse_args()
     
     try: